@@ -1,11 +1,18 @@
 import numbers
 import json
+from itertools import product
 
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from . import _z5py
 from .attribute_manager import AttributeManager
-from .shape_utils import normalize_slices, rectify_shape, get_default_chunks
+from .shape_utils import (normalize_slices, normalize_int, is_full_index,
+                          rectify_shape, get_default_chunks)
 
 AVAILABLE_COMPRESSORS = _z5py.get_available_codecs()
 # TODO lz4 compression is currently not compatible with zarr
@@ -13,6 +20,57 @@ AVAILABLE_COMPRESSORS = _z5py.get_available_codecs()
 COMPRESSORS_ZARR = ('raw', 'blosc', 'zlib', 'bzip2', 'gzip')
 COMPRESSORS_N5 = ('raw', 'blosc', 'gzip', 'bzip2', 'xz', 'lz4')
 
+# use orjson for (de)serializing the compression options if available,
+# it is considerably faster than the standard library json
+if orjson is None:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+else:
+    def _json_dumps(obj):
+        return orjson.dumps(obj).decode('utf-8')
+    _json_loads = orjson.loads
+
+# default options of the compression libraries for the two formats;
+# the blosc codec is set from Dataset.zarr_default_codec / n5_default_codec
+_ZARR_COMPRESSION_DEFAULTS = {'blosc': {'clevel': 5, 'shuffle': 1, 'blocksize': 0},
+                              'zlib': {'id': 'zlib', 'level': 5},
+                              'gzip': {'id': 'gzip', 'level': 5},
+                              'bzip2': {'level': 5},
+                              'lz4': {'level': 6},
+                              'raw': {}}
+_N5_COMPRESSION_DEFAULTS = {'gzip': {'level': 1},
+                            'bzip2': {'level': 5},
+                            'raw': {},
+                            'xz': {'level': 6},
+                            'lz4': {'level': 6},
+                            'blosc': {'clevel': 5, 'shuffle': 1, 'blocksize': 0, 'nthreads': 1}}
+
+
+# outputs smaller than this are allocated with np.empty,
+# alignment does not matter for copying a few cache lines
+_ALIGNED_MIN_NBYTES = 4096
+
+
+def _empty_aligned(shape, dtype, align=64):
+    """ Allocate an uninitialized array whose data is aligned to ``align`` bytes.
+
+    numpy only guarantees 16 byte alignment, but copying decompressed chunks
+    into the output is faster if the destination is aligned for wide simd stores.
+    Small arrays are allocated with ``np.empty``.
+    """
+    size = 1
+    for sh in shape:
+        if sh < 0:
+            raise ValueError("negative dimensions are not allowed")
+        size *= sh
+    nbytes = size * dtype.itemsize
+    if nbytes < _ALIGNED_MIN_NBYTES:
+        return np.empty(shape, dtype=dtype)
+    buf = np.empty(nbytes + align, dtype='uint8')
+    offset = -buf.ctypes.data % align
+    # the returned view keeps buf alive via its base
+    return buf[offset:offset + nbytes].view(dtype).reshape(shape)
+
 
 class Dataset:
     """ Dataset for access to data on disc.
@@ -22,93 +80,90 @@ class Dataset:
     the ``[]`` operator of File or Group.
     """
 
-    _dtype_dict = {np.dtype('uint8'): 'uint8',
-                   np.dtype('uint16'): 'uint16',
-                   np.dtype('uint32'): 'uint32',
-                   np.dtype('uint64'): 'uint64',
-                   np.dtype('int8'): 'int8',
-                   np.dtype('int16'): 'int16',
-                   np.dtype('int32'): 'int32',
-                   np.dtype('int64'): 'int64',
-                   np.dtype('float32'): 'float32',
-                   np.dtype('float64'): 'float64'}
+    # maps numpy dtype names to the datatype names of the c++ backend
+    _dtype_dict = {'uint8': 'uint8',
+                   'uint16': 'uint16',
+                   'uint32': 'uint32',
+                   'uint64': 'uint64',
+                   'int8': 'int8',
+                   'int16': 'int16',
+                   'int32': 'int32',
+                   'int64': 'int64',
+                   'float32': 'float32',
+                   'float64': 'float64'}
 
     # Compression libraries supported by zarr format
     compressors_zarr = tuple(comp for comp in COMPRESSORS_ZARR if AVAILABLE_COMPRESSORS[comp])
     # Default compression for zarr format
     zarr_default_compressor = 'blosc' if AVAILABLE_COMPRESSORS['blosc'] else 'raw'
+    # Default blosc codec for zarr format
+    # NOTE this requires blosc to be built with zstd support (which is the default for c-blosc);
+    # set this to 'lz4' for blosc builds without zstd
+    zarr_default_codec = 'zstd'
 
     # Compression libraries supported by n5 format
     compressors_n5 = tuple(comp for comp in COMPRESSORS_N5 if AVAILABLE_COMPRESSORS[comp])
     # Default compression for n5 format
-    n5_default_compressor = 'gzip' if AVAILABLE_COMPRESSORS['gzip'] else 'raw'
+    if AVAILABLE_COMPRESSORS['blosc']:
+        n5_default_compressor = 'blosc'
+    elif AVAILABLE_COMPRESSORS['gzip']:
+        n5_default_compressor = 'gzip'
+    else:
+        n5_default_compressor = 'raw'
+    # Default blosc codec for n5 format (requires blosc with zstd support, see above)
+    n5_default_codec = 'zstd'
 
     def __init__(self, dset_impl, handle, parent, name, n_threads=1):
         self._impl = dset_impl
         self._handle = handle
-        self._attrs = AttributeManager(self._handle)
+        # the attribute manager is created on first access
+        self._attrs = None
         self.n_threads = n_threads
         self._parent = parent
         self._name = name
+        # the dataset metadata is immutable, so we cache it here
+        # to avoid going through the c++ bindings on every access
+        self._shape = tuple(self._impl.shape)
+        self._ndim = self._impl.ndim
+        self._dtype = np.dtype(self._impl.dtype)
+        self._chunks = tuple(self._impl.chunks)
+        self._size = self._impl.size
+        # offset for full reads and index for extracting scalars
+        self._zero_begin = (0,) * self._ndim
+        # compression options are decoded lazily on first access
+        self._compression_opts = None
 
     def __array__(self):
         return self[...]
 
     @staticmethod
-    def _to_zarr_compression_options(compression, compression_options):
-        if compression == 'blosc':
-            default_opts = {'codec': 'lz4', 'clevel': 5, 'shuffle': 1, 'blocksize': 0}
-        elif compression == 'zlib':
-            default_opts = {'id': 'zlib', 'level': 5}
-        elif compression == 'gzip':
-            default_opts = {'id': 'gzip', 'level': 5}
-        elif compression == 'bzip2':
-            default_opts = {'level': 5}
-        elif compression == 'lz4':
-            default_opts = {'level': 6}
-        elif compression == 'raw':
-            default_opts = {}
-        else:
-            raise RuntimeError("Compression %s is not supported in zarr format" % compression)
-
+    def _update_compression_options(compression, default_opts, compression_options):
         # check for invalid options
         extra_args = set(compression_options) - set(default_opts)
         if extra_args:
             raise RuntimeError("Invalid options for %s compression: %s" % (compression, ' '.join(list(extra_args))))
-
-        # return none for raw compression
-        if not default_opts:
-            return {}
-
         # update the default options
-        default_opts.update(compression_options)
-        return default_opts
+        opts = dict(default_opts)
+        opts.update(compression_options)
+        return opts
 
-    @staticmethod
-    def _to_n5_compression_options(compression, compression_options):
-        if compression == 'gzip':
-            default_opts = {'level': 5}
-        elif compression == 'bzip2':
-            default_opts = {'level': 5}
-        elif compression == 'raw':
-            default_opts = {}
-        elif compression == 'xz':
-            default_opts = {'level': 6}
-        elif compression == 'lz4':
-            default_opts = {'level': 6}
-        elif compression == 'blosc':
-            default_opts = {'codec': 'lz4', 'clevel': 5, 'shuffle': 1, 'blocksize': 0, 'nthreads': 1}
-        else:
-            raise RuntimeError("Compression %s is not supported in n5 format" % compression)
-
-        # check for invalid options
-        extra_args = set(compression_options) - set(default_opts)
-        if extra_args:
-            raise RuntimeError("Invalid options for %s compression: %s" % (compression, ' '.join(list(extra_args))))
+    @classmethod
+    def _to_zarr_compression_options(cls, compression, compression_options):
+        default_opts = _ZARR_COMPRESSION_DEFAULTS.get(compression)
+        if default_opts is None:
+            raise RuntimeError("Compression %s is not supported in zarr format" % compression)
+        if compression == 'blosc':
+            default_opts = dict(default_opts, codec=cls.zarr_default_codec)
+        return cls._update_compression_options(compression, default_opts, compression_options)
 
-        # update the default options
-        default_opts.update(compression_options)
-        return default_opts
+    @classmethod
+    def _to_n5_compression_options(cls, compression, compression_options):
+        default_opts = _N5_COMPRESSION_DEFAULTS.get(compression)
+        if default_opts is None:
+            raise RuntimeError("Compression %s is not supported in n5 format" % compression)
+        if compression == 'blosc':
+            default_opts = dict(default_opts, codec=cls.n5_default_codec)
+        return cls._update_compression_options(compression, default_opts, compression_options)
 
     # NOTE in contrast to h5py, we also check that the chunks match
     # this is crucial, because different chunks can lead to subsequent incorrect
@@ -207,7 +262,9 @@ class Dataset:
         elif not is_zarr and compression not in cls.compressors_n5:
             compression = cls.n5_default_compressor
 
-        if parsed_dtype not in cls._dtype_dict:
+        # non-native byte order is not supported, but has the same dtype name
+        dtype_name = cls._dtype_dict.get(parsed_dtype.name) if parsed_dtype.isnative else None
+        if dtype_name is None:
             raise ValueError("Invalid data type {} for N5 dataset".format(repr(dtype)))
 
         # update the compression options
@@ -217,9 +274,9 @@ class Dataset:
             copts = cls._to_n5_compression_options(compression, compression_options)
 
         # convert the copts to json parseable string
-        copts = json.dumps(copts)
+        copts = _json_dumps(copts)
         # get the dataset and write data if necessary
-        impl = _z5py.create_dataset(ghandle, name, cls._dtype_dict[parsed_dtype],
+        impl = _z5py.create_dataset(ghandle, name, dtype_name,
                                     shape, chunks, compression, copts, fillvalue)
         handle = ghandle.get_dataset_handle(name)
         ds = cls(impl, handle, group, group._name + '/' + name, n_threads)
@@ -244,37 +301,39 @@ class Dataset:
     def attrs(self):
         """ The ``AttributeManager`` of this dataset.
         """
+        if self._attrs is None:
+            self._attrs = AttributeManager(self._handle)
         return self._attrs
 
     @property
     def shape(self):
         """ Shape of this dataset.
         """
-        return tuple(self._impl.shape)
+        return self._shape
 
     @property
     def ndim(self):
         """ Number of dimensions of this dataset.
         """
-        return self._impl.ndim
+        return self._ndim
 
     @property
     def size(self):
         """ Size (total number of elements) of this dataset.
         """
-        return self._impl.size
+        return self._size
 
     @property
     def chunks(self):
         """ Chunks of this dataset.
         """
-        return tuple(self._impl.chunks)
+        return self._chunks
 
     @property
     def dtype(self):
         """ Datatype of this dataset.
         """
-        return np.dtype(self._impl.dtype)
+        return self._dtype
 
     @property
     def chunks_per_dimension(self):
@@ -296,10 +355,17 @@ class Dataset:
     def compression_opts(self):
         """ Compression library options of this dataset.
         """
-        copts = self._impl.compression_options
-        # decode to json
-        copts = json.loads(copts)
-        return copts
+        copts = self._compression_opts
+        if copts is None:
+            # decode from json; the options are fixed once the dataset
+            # is opened, so we only need to do this once
+            # (raw compression has no options and decodes to None)
+            copts = _json_loads(self._impl.compression_options)
+            if copts is None:
+                return None
+            self._compression_opts = copts
+        # return a copy, so that the cached options cannot be modified
+        return dict(copts)
 
     @property
     def parent(self):
@@ -319,7 +385,7 @@ class Dataset:
         return parent
 
     def __len__(self):
-        return self._impl.len
+        return self._shape[0]
 
     def index_to_roi(self, index):
         """ Convert index to region of interest.
@@ -335,27 +401,44 @@ class Dataset:
             tuple: shape of the region of interest.
             tuple: which dimensions should be squeezed out
         """
-        normalized, to_squeeze = normalize_slices(index, self.shape)
-        return (
-            tuple(norm.start for norm in normalized),
-            tuple(
-                0 if norm.start is None else norm.stop - norm.start for norm in normalized
-            ),
-            to_squeeze
-        )
+        normalized, to_squeeze = normalize_slices(index, self._shape)
+        # compute offset and shape in a single pass over the normalized slices
+        roi_begin, roi_shape = [], []
+        for norm in normalized:
+            start = norm.start
+            roi_begin.append(start)
+            roi_shape.append(0 if start is None else norm.stop - start)
+        return tuple(roi_begin), tuple(roi_shape), to_squeeze
+
+    def _read_scalar(self, index):
+        roi_begin = [normalize_int(int(i), size) for i, size in zip(index, self._shape)]
+        # the buffer is tiny, but we cannot share it between calls,
+        # because datasets may be read from multiple threads
+        out = np.empty((1,) * self._ndim, dtype=self._dtype)
+        _z5py.read_subarray(self._impl, out, roi_begin, n_threads=1)
+        return out[self._zero_begin]
 
     # most checks are done in c++
     def __getitem__(self, index):
-        roi_begin, shape, to_squeeze = self.index_to_roi(index)
-        out = np.empty(shape, dtype=self.dtype)
+        # point lookups don't need the general slicing machinery
+        if isinstance(index, tuple) and len(index) == self._ndim and\
+                all(isinstance(i, numbers.Integral) for i in index):
+            return self._read_scalar(index)
+        # reading the whole dataset does not need any index normalization
+        if is_full_index(index, self._ndim):
+            roi_begin, shape, to_squeeze = self._zero_begin, self._shape, ()
+        else:
+            roi_begin, shape, to_squeeze = self.index_to_roi(index)
+        out = _empty_aligned(shape, self._dtype)
         if 0 not in shape:
             _z5py.read_subarray(self._impl,
                                 out, roi_begin,
                                 n_threads=self.n_threads)
 
-        # todo: this probably has more copies than necessary
+        # all dimensions are squeezed out -> return the (numpy) scalar
+        # without copying the array
         if len(to_squeeze) == len(shape):
-            return out.flatten()[0]
+            return out[self._zero_begin]
         elif to_squeeze:
             return out.squeeze(to_squeeze)
         else:
@@ -363,19 +446,25 @@ class Dataset:
 
     # most checks are done in c++
     def __setitem__(self, index, item):
-        roi_begin, shape, _ = self.index_to_roi(index)
+        if is_full_index(index, self._ndim):
+            roi_begin, shape = self._zero_begin, self._shape
+        else:
+            roi_begin, shape, _ = self.index_to_roi(index)
         if 0 in shape:
             return
 
         # broadcast scalar
+        # chunks that only contain the fill value afterwards are not written
+        # (and removed if they exist) by the c++ backend, so writing the fill value
+        # to a dataset only removes chunks and does not write any data
         if isinstance(item, (numbers.Number, np.number)):
             _z5py.write_scalar(self._impl, roi_begin,
                                list(shape), item,
-                               str(self.dtype), self.n_threads)
+                               str(self._dtype), self.n_threads)
             return
 
         try:
-            item_arr = np.asarray(item, self.dtype, order='C')
+            item_arr = np.asarray(item, self._dtype, order='C')
         except ValueError as e:
             if any(s in str(e) for s in ('invalid literal for ', 'could not convert')):
                 bad_dtype = np.asarray(item).dtype
@@ -430,20 +519,32 @@ class Dataset:
         start = [s.start for s in dest_sel]
         self.write_subarray(start, source[source_sel])
 
+    def _as_c(self, arr):
+        arr = np.asarray(arr)
+        # only copy if the data is not c-contiguous or has the wrong dtype
+        if arr.dtype == self._dtype:
+            return arr if arr.flags.c_contiguous else np.ascontiguousarray(arr)
+        # only allow casts within the same kind, e.g. float64 to float32, but not float to int
+        if not np.can_cast(arr.dtype, self._dtype, 'same_kind'):
+            raise TypeError("Cannot write data of type %s to dataset of type %s" % (arr.dtype, self._dtype))
+        return np.ascontiguousarray(arr, dtype=self._dtype)
+
     # expose the impl write subarray functionality
     def write_subarray(self, start, data):
         """ Write subarray to dataset.
 
         ``data`` is written to region of interest, defined by ``start``
         and the shape of ``data``. The region of interest must be in
-        bounds of the dataset and the datatype must agree with the dataset.
+        bounds of the dataset. Data of a different datatype is cast to the datatype
+        of the dataset if this is a cast within the same kind (e.g. int64 to int32),
+        otherwise a TypeError is raised.
 
         Args:
             start (tuple): offset of the roi to write.
             data (np.ndarray): data to write; shape determines the roi shape.
         """
         _z5py.write_subarray(self._impl,
-                             np.require(data, requirements='C'),
+                             self._as_c(data),
                              list(start),
                              n_threads=self.n_threads)
 
@@ -462,10 +563,79 @@ class Dataset:
             np.ndarray
         """
         shape = tuple(sto - sta for sta, sto in zip(start, stop))
-        out = np.empty(shape, dtype=self.dtype)
+        out = _empty_aligned(shape, self._dtype)
         _z5py.read_subarray(self._impl, out, start, n_threads=self.n_threads)
         return out
 
+    def read_many(self, begins, shapes):
+        """ Read multiple regions of interest.
+
+        Each chunk that intersects with more than one of the regions of interest
+        is only read and decompressed once. This is much faster than reading
+        the regions one by one if they are small compared to the chunks and
+        many of them fall into the same chunks. Regions that don't share any chunk
+        with another region are read directly. Only one chunk is held in memory at a time.
+
+        Args:
+            begins (list[tuple]): offsets of the rois.
+            shapes (list[tuple]): shapes of the rois; must have same length as ``begins``.
+
+        Returns:
+            list[np.ndarray]
+        """
+        if len(begins) != len(shapes):
+            raise ValueError("Need the same number of offsets and shapes")
+        ds_shape, chunks = self._shape, self._chunks
+
+        # validate the rois, allocate the outputs and map chunks to the rois they intersect
+        rois, outs = [], []
+        roi_chunk_ids = []
+        chunk_to_rois = {}
+        for roi_id, (begin, shape) in enumerate(zip(begins, shapes)):
+            begin, shape = tuple(begin), tuple(shape)
+            if len(begin) != self._ndim or len(shape) != self._ndim:
+                raise ValueError("Roi dimension does not match dataset dimension %i" % self._ndim)
+            if any(b < 0 or sh < 0 or b + sh > dsh for b, sh, dsh in zip(begin, shape, ds_shape)):
+                raise ValueError("Roi with offset %s and shape %s is out of range" % (str(begin),
+                                                                                      str(shape)))
+            stop = tuple(b + sh for b, sh in zip(begin, shape))
+            rois.append((begin, stop))
+            outs.append(_empty_aligned(shape, self._dtype))
+            if 0 in shape:
+                roi_chunk_ids.append([])
+                continue
+
+            chunk_ranges = [range(b // ch, (sto - 1) // ch + 1)
+                            for b, sto, ch in zip(begin, stop, chunks)]
+            chunk_ids = list(product(*chunk_ranges))
+            roi_chunk_ids.append(chunk_ids)
+            for chunk_id in chunk_ids:
+                chunk_to_rois.setdefault(chunk_id, []).append(roi_id)
+
+        # rois that don't share a chunk with any other roi are read directly
+        for roi_id, chunk_ids in enumerate(roi_chunk_ids):
+            if chunk_ids and all(len(chunk_to_rois[chunk_id]) == 1 for chunk_id in chunk_ids):
+                _z5py.read_subarray(self._impl, outs[roi_id], rois[roi_id][0],
+                                    n_threads=self.n_threads)
+                for chunk_id in chunk_ids:
+                    del chunk_to_rois[chunk_id]
+
+        # read each of the remaining chunks once and copy it into all rois it intersects
+        for chunk_id in sorted(chunk_to_rois):
+            chunk_begin = tuple(cid * ch for cid, ch in zip(chunk_id, chunks))
+            chunk_stop = tuple(min(cb + ch, dsh) for cb, ch, dsh in zip(chunk_begin, chunks, ds_shape))
+            chunk_data = self.read_subarray(chunk_begin, chunk_stop)
+
+            for roi_id in chunk_to_rois[chunk_id]:
+                begin, stop = rois[roi_id]
+                overlap = [(max(b, cb), min(sto, cst))
+                           for b, sto, cb, cst in zip(begin, stop, chunk_begin, chunk_stop)]
+                out_bb = tuple(slice(lo - b, hi - b) for (lo, hi), b in zip(overlap, begin))
+                chunk_bb = tuple(slice(lo - cb, hi - cb) for (lo, hi), cb in zip(overlap, chunk_begin))
+                outs[roi_id][out_bb] = chunk_data[chunk_bb]
+
+        return outs
+
     def chunk_exists(self, chunk_indices):
         """ Check if chunk has data.
 
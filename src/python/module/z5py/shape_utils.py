@@ -7,37 +7,29 @@ def slice_to_start_stop(s, size):
     if s.step not in (None, 1):
         raise ValueError('Nontrivial steps are not supported')
 
-    if s.start is None:
-        start = 0
-    elif -size <= s.start < 0:
-        start = size + s.start
-    elif s.start < -size or s.start >= size:
+    start = 0 if s.start is None else (s.start + size if s.start < 0 else s.start)
+    if not 0 <= start < size:
         return slice(None, 0)
-    else:
-        start = s.start
-
-    if s.stop is None or s.stop > size:
-        stop = size
-    elif s.stop < 0:
-        stop = (size + s.stop)
-    else:
-        stop = s.stop
 
+    stop = size if s.stop is None else min(s.stop + size if s.stop < 0 else s.stop, size)
     if stop < 1:
         return slice(None, 0)
 
     return slice(start, stop)
 
 
+def normalize_int(i, size):
+    """For a single dimension with a given size, wrap a (negative) int index
+    into range(size)."""
+    if not -size <= i < size:
+        raise ValueError('Index ({}) out of range (0-{})'.format(i, size - 1))
+    return i + size if i < 0 else i
+
+
 def int_to_start_stop(i, size):
     """For a single dimension with a given size, turn an int into slice(start, stop)
     pair."""
-    if -size < i < 0:
-        start = i + size
-    elif i >= size or i < -size:
-        raise ValueError('Index ({}) out of range (0-{})'.format(i, size - 1))
-    else:
-        start = i
+    start = normalize_int(i, size)
     return slice(start, start + 1)
 
 
@@ -104,6 +96,27 @@ def get_default_chunks(shape):
     return tuple(min(default_dim, sh) for sh in shape)
 
 
+def _is_full_slice(s):
+    return isinstance(s, slice) and s.start is None and s.stop is None and s.step in (None, 1)
+
+
+def is_full_index(index, ndim):
+    """ Check whether index selects the full array of dimension ndim,
+    e.g. ``[:]``, ``[...]`` or ``[:, :, ...]``.
+    """
+    if index is Ellipsis:
+        return True
+    if isinstance(index, tuple):
+        n_ellipsis = 0
+        for item in index:
+            if item is Ellipsis:
+                n_ellipsis += 1
+            elif not _is_full_slice(item):
+                return False
+        return n_ellipsis <= 1 and len(index) - n_ellipsis <= ndim
+    return _is_full_slice(index)
+
+
 def normalize_slices(slices, shape):
     """ Normalize slices to shape.
 
@@ -120,35 +133,44 @@ def normalize_slices(slices, shape):
     type_msg = 'Advanced selection inappropriate. ' \
                'Only numbers, slices (`:`), and ellipsis (`...`) are valid indices (or tuples thereof)'
 
-    if isinstance(slices, tuple):
-        slices_lst = list(slices)
-    elif isinstance(slices, (numbers.Number, slice, type(Ellipsis))):
-        slices_lst = [slices]
-    else:
-        raise TypeError(type_msg)
-
     ndim = len(shape)
-    if len([item for item in slices_lst if item != Ellipsis]) > ndim:
+    # fast path for the most common case: one plain slice per dimension,
+    # which does not need any of the ellipsis / squeeze handling below
+    if isinstance(slices, tuple) and len(slices) == ndim and\
+            all(type(item) is slice for item in slices):
+        return tuple(slice_to_start_stop(item, size) for item, size in zip(slices, shape)), ()
+
+    if not isinstance(slices, tuple):
+        if not isinstance(slices, (numbers.Number, slice, type(Ellipsis))):
+            raise TypeError(type_msg)
+        slices = (slices,)
+
+    n_items = len(slices)
+    for item in slices:
+        if item is Ellipsis:
+            n_items -= 1
+    if n_items > ndim:
         raise TypeError("Argument sequence too long")
-    elif len(slices_lst) < ndim and Ellipsis not in slices_lst:
-        slices_lst.append(Ellipsis)
 
     normalized = []
     found_ellipsis = False
     squeeze = []
-    for item in slices_lst:
+    for item in slices:
         d = len(normalized)
         if isinstance(item, slice):
             normalized.append(slice_to_start_stop(item, shape[d]))
         elif isinstance(item, numbers.Number):
             squeeze.append(d)
             normalized.append(int_to_start_stop(int(item), shape[d]))
-        elif isinstance(item, type(Ellipsis)):
+        elif item is Ellipsis:
             if found_ellipsis:
                 raise ValueError("Only one ellipsis may be used")
             found_ellipsis = True
-            while len(normalized) + (len(slices_lst) - d - 1) < ndim:
-                normalized.append(slice(0, shape[len(normalized)]))
+            normalized.extend(slice(0, shape[dd]) for dd in range(d, d + ndim - n_items))
         else:
             raise TypeError(type_msg)
+
+    # missing trailing dimensions are selected completely (implicit ellipsis)
+    if not found_ellipsis:
+        normalized.extend(slice(0, shape[d]) for d in range(len(normalized), ndim))
     return tuple(normalized), tuple(squeeze)
@@ -69,6 +69,19 @@ class CompressionTestMixin(ABC):
             info = np.finfo(dtype)
         return info.min + 1, info.max - 1
 
+    def test_default_compression(self):
+        from z5py.dataset import AVAILABLE_COMPRESSORS
+        ds = self.root_file.create_dataset('ds_default', shape=self.shape,
+                                           chunks=self.chunks, dtype='uint8')
+        if AVAILABLE_COMPRESSORS['blosc']:
+            self.assertEqual(ds.compression, 'blosc')
+            self.assertEqual(ds.compression_opts['codec'], 'zstd')
+        elif self.data_format == 'n5' and AVAILABLE_COMPRESSORS['gzip']:
+            self.assertEqual(ds.compression, 'gzip')
+            self.assertEqual(ds.compression_opts['level'], 1)
+        else:
+            self.assertEqual(ds.compression, 'raw')
+
     def test_large_values_gzip(self):
         f = self.root_file
         compression = 'zlib' if f.is_zarr else 'gzip'
@@ -124,6 +137,14 @@ class TestZarrCompression(CompressionTestMixin, unittest.TestCase):
 class TestN5Compression(CompressionTestMixin, unittest.TestCase):
     data_format = 'n5'
 
+    def test_gzip_default_level(self):
+        from z5py.dataset import AVAILABLE_COMPRESSORS
+        if not AVAILABLE_COMPRESSORS['gzip']:
+            self.skipTest("gzip is not available")
+        ds = self.root_file.create_dataset('ds_gzip', shape=self.shape, chunks=self.chunks,
+                                           dtype='uint8', compression='gzip')
+        self.assertEqual(ds.compression_opts['level'], 1)
+
 
 if __name__ == '__main__':
     unittest.main()
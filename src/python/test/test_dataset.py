@@ -67,6 +67,16 @@ class DatasetTestMixin(ABC):
                              'datatype %s failed for format %s' % (self.data_format.title(),
                                                                    dtype))
 
+    def test_ds_dtype_aliases(self):
+        # equivalent aliases of supported dtypes are accepted
+        ds = self.root_file.create_dataset('longlong', dtype='longlong',
+                                           shape=(10, 10), chunks=(5, 5))
+        self.assertEqual(ds.dtype, np.dtype('int64'))
+        # non-native byte order is not supported, although the dtype name is the same
+        with self.assertRaises(ValueError):
+            self.root_file.create_dataset('swapped', dtype=np.dtype('uint16').newbyteorder(),
+                                          shape=(10, 10), chunks=(5, 5))
+
     def check_ones(self, sliced_ones, expected_shape, msg=None):
         self.check_array(sliced_ones, np.ones(expected_shape, dtype=np.uint8), msg)
 
@@ -111,6 +121,20 @@ class DatasetTestMixin(ABC):
         with self.assertRaises(TypeError):
             ds[1, 1, NotAnIndex()]
 
+    def test_ds_indexing_negative_size(self):
+        ds = self.root_file.create_dataset('data', dtype='float64',
+                                           shape=self.shape, chunks=(10, 10, 10))
+        data = np.random.rand(*self.shape)
+        ds[:] = data
+        size = self.shape[0]
+        self.check_array(ds[-size], data[0])
+        self.assertEqual(ds[-size, 0, 0], data[0, 0, 0])
+        self.assertEqual(ds[-size, -size, -size], data[0, 0, 0])
+        with self.assertRaises(ValueError):
+            ds[-size - 1]
+        with self.assertRaises(ValueError):
+            ds[-size - 1, 0, 0]
+
     def test_ds_scalar_broadcast(self):
         for dtype in self.base_dtypes:
             ds = self.root_file.create_dataset('ones_%s' % dtype,
@@ -132,6 +156,20 @@ class DatasetTestMixin(ABC):
         ds[:] = True
         self.check_ones(ds[:], self.shape)
 
+    def test_ds_scalar_broadcast_fill_value(self):
+        ds = self.root_file.create_dataset('ones', dtype=np.uint8,
+                                           shape=(20, 20), chunks=(10, 10))
+        ds[:] = 1
+        self.assertTrue(ds.chunk_exists((0, 0)))
+        # chunks that are completely set to the fill value are removed
+        ds[:10, :] = 0
+        self.assertFalse(ds.chunk_exists((0, 0)))
+        self.assertFalse(ds.chunk_exists((0, 1)))
+        self.assertTrue(ds.chunk_exists((1, 0)))
+        ds[:] = 0
+        self.assertFalse(any(ds.chunk_exists((i, j)) for i in range(2) for j in range(2)))
+        self.check_array(ds[:], np.zeros((20, 20), dtype=np.uint8))
+
     def test_ds_set_with_arraylike(self):
         ds = self.root_file.create_dataset('ones', dtype=np.uint8,
                                            shape=self.shape, chunks=(10, 10, 10))
@@ -317,6 +355,52 @@ class DatasetTestMixin(ABC):
         out = ds[:]
         self.assertTrue(np.allclose(out[selection], data[selection]))
 
+    def test_read_many(self):
+        shape = (100, 100)
+        chunks = (10, 10)
+
+        ds = self.root_file.create_dataset('test', dtype='float64',
+                                           shape=shape, chunks=chunks,
+                                           compression='raw')
+        data = np.random.rand(*shape)
+        ds[:] = data
+
+        # rois sharing chunks, rois spanning several chunks and
+        # a large roi that doesn't share chunks with any other roi
+        begins = [(0, 0), (5, 7), (8, 8), (95, 3), (37, 41), (12, 12), (60, 50)]
+        shapes = [(3, 3), (4, 6), (5, 5), (5, 20), (30, 1), (0, 4), (30, 45)]
+        outs = ds.read_many(begins, shapes)
+        self.assertEqual(len(outs), len(begins))
+        for out, begin, roi_shape in zip(outs, begins, shapes):
+            bb = tuple(slice(b, b + sh) for b, sh in zip(begin, roi_shape))
+            self.check_array(out, data[bb])
+
+        with self.assertRaises(ValueError):
+            ds.read_many([(98, 0)], [(5, 5)])
+        with self.assertRaises(ValueError):
+            ds.read_many([(5, 0)], [(-1, 2)])
+
+    def test_negative_extent_fails(self):
+        ds = self.root_file.create_dataset('test', dtype='int16',
+                                           shape=(20, 20), chunks=(10, 10))
+        ds[:] = 1
+        with self.assertRaises(ValueError):
+            ds[5:4, 0:2]
+        with self.assertRaises(ValueError):
+            ds.read_subarray((5, 0), (4, 2))
+
+    def test_write_subarray_dtype(self):
+        ds = self.root_file.create_dataset('test', dtype='int8',
+                                           shape=(10, 10), chunks=(5, 5))
+        # casts within the same kind are allowed, out of range values wrap like in numpy
+        ds.write_subarray((0, 0), np.full((2, 2), 257, dtype='int64'))
+        self.check_array(ds[:2, :2], np.ones((2, 2), dtype='int8'))
+        ds.write_subarray((2, 2), np.full((2, 2), 3, dtype='int32'))
+        self.check_array(ds[2:4, 2:4], np.full((2, 2), 3, dtype='int8'))
+        # casts to a different kind are rejected
+        with self.assertRaises(TypeError):
+            ds.write_subarray((0, 0), np.full((2, 2), 1.5))
+
     def test_irregular_chunks(self):
         shape = (123, 54, 211)
         chunks = (13, 33, 22)